@@ -17,6 +17,8 @@ class ScheduleConfig(BaseModel):
     rooms: List[Dict[str, str]] = Field(default=[], description="List of rooms with name")
     min_students_per_room: Optional[int] = None
     max_students_per_room: Optional[int] = None
+    auto_size_rooms: bool = Field(default=False, description="Search the smallest room count when rooms are auto-generated")
+    seed: Optional[int] = Field(default=None, description="Seed for reproducible runs; None = random")
 
     @validator('end_date')
     def end_date_must_be_after_start_date(cls, v, values):
@@ -44,6 +46,12 @@ class UploadResponse(BaseModel):
     total_students: int
     subjects: List[str]
 
+class RoomSizing(BaseModel):
+    lower_bound: int
+    rooms: int
+    probes: int
+
 class ScheduleResponse(BaseModel):
     results: List[ScheduleResult]
     warnings: List[str]
+    room_sizing: Optional[RoomSizing] = None
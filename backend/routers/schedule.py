@@ -1,35 +1,37 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Body
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Body, Response
+from typing import List, Union
 import pandas as pd
 from io import BytesIO
 from backend.models.schema import StudentData, ScheduleConfig, ScheduleResult, UploadResponse, ScheduleResponse
-from backend.services.scheduler import parse_excel, HillClimbingScheduler
+from backend.services.scheduler import parse_excel, parse_json, EnrollmentStore, HillClimbingScheduler
 
 router = APIRouter(prefix="/api", tags=["schedule"])
 
 # In-memory storage for demo purposes
 # In a real app, use a database or Redis
-uploaded_students: List[StudentData] = []
+uploaded_students: Union[List[StudentData], EnrollmentStore] = []
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_file(file: UploadFile = File(...)):
     if not file.filename.endswith(('.xlsx', '.xls', '.json')):
         raise HTTPException(status_code=400, detail="Invalid file format")
     
-    content = await file.read()
-    
     global uploaded_students
     
     if file.filename.endswith('.json'):
-        from backend.services.scheduler import parse_json
-        uploaded_students = parse_json(content)
+        # Stream straight from the spooled upload instead of reading it into memory
+        uploaded_students = parse_json(file.file)
+        subjects = set(uploaded_students.subject_names)
     else:
+        content = await file.read()
         uploaded_students = parse_excel(content)
-    
-    subjects = set()
-    for s in uploaded_students:
-        subjects.update(s.subjects.keys())
-        
+        subjects = set()
+        for s in uploaded_students:
+            subjects.update(s.subjects.keys())
+
+    if not uploaded_students:
+        raise HTTPException(status_code=400, detail="No students found in file")
+
     return UploadResponse(
         filename=file.filename,
         total_students=len(uploaded_students),
@@ -44,8 +46,8 @@ async def create_schedule(config: ScheduleConfig):
         
     scheduler = HillClimbingScheduler(config, uploaded_students)
     try:
-        results, warnings = scheduler.schedule()
-        return ScheduleResponse(results=results, warnings=warnings)
+        # Serialized by the scheduler to skip re-validating every result row
+        return Response(content=scheduler.schedule_json(), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -3,17 +3,27 @@ import random
 import math
 import json
 import re
+import codecs
+from array import array
+from io import BytesIO
 from datetime import timedelta, datetime
-from typing import List, Dict, Any, Set, Tuple
+from typing import List, Dict, Any, Set, Tuple, Iterator, BinaryIO, Union
+from pydantic import parse_obj_as
 from backend.models.schema import ScheduleConfig, StudentData, ScheduleResult
 
 class HillClimbingScheduler:
-    def __init__(self, config: ScheduleConfig, students: List[StudentData]):
+    def __init__(self, config: ScheduleConfig, students: Union[List[StudentData], "EnrollmentStore"]):
         self.config = config
         self.students = students
         # Pre-process subjects: Name -> {duration, student_ids}
         self.all_subjects = self._preprocess_subjects()
         self.dates = self._generate_dates()
+        self.room_sizing: Dict[str, int] = {}
+        # Set when auto-sizing found a room count; the search then also climbs
+        # from the sizing pass, which places every subject at that count
+        self._sized_rooms = False
+        self._conflicts: Dict[str, Set[str]] = None
+        self.stats: Dict[str, Any] = {}
         
         # Auto-calculate rooms if not provided
         if not self.config.rooms:
@@ -60,11 +70,88 @@ class HillClimbingScheduler:
             
         # Ensure we have at least enough rooms for the largest class split
         estimated_rooms = max(1, estimated_rooms, max_concurrent_needed)
+
+        if self.config.auto_size_rooms:
+            # No schedule can use fewer rooms than the largest class split or
+            # than total exam minutes / minutes one room offers (breaks ignored)
+            lower_bound = max(1, max_concurrent_needed)
+            if minutes_per_room:
+                lower_bound = max(lower_bound, math.ceil(total_minutes_needed / minutes_per_room))
+            estimated_rooms = self._search_min_rooms(lower_bound, estimated_rooms)
+
         print(f"Auto-generating {estimated_rooms} rooms (Peak needed: {max_concurrent_needed})...")
         
-        self.config.rooms = [{"name": f"Phòng {i+1}"} for i in range(estimated_rooms)]
+        self.config.rooms = self._make_rooms(estimated_rooms)
+
+    def _make_rooms(self, n_rooms: int) -> List[Dict[str, str]]:
+        return [{"name": f"Phòng {i+1}"} for i in range(n_rooms)]
+
+    def _rooms_feasible(self, n_rooms: int) -> bool:
+        # Fast check: one deterministic greedy pass, no hill climbing. Each
+        # subject takes only the rooms max_students requires and never overlaps
+        # a subject it shares students with, so the room count decides how
+        # many subjects can share a slot without clashes.
+        self.config.rooms = self._make_rooms(n_rooms)
+        _, warnings = self._generate_initial_solution(shuffle=False, sizing=True, verbose=False)
+        return not warnings
+
+    def _search_min_rooms(self, lower_bound: int, estimate: int) -> int:
+        # Binary search the smallest room count for which the greedy pass places
+        # every subject. The estimate is only a starting point for the upper
+        # bound, which is doubled until the greedy pass succeeds.
+        upper_limit = max(estimate, sum(
+            math.ceil(len(info["student_ids"]) / self.config.max_students_per_room)
+            for info in self.all_subjects.values()
+        ))
+        lo, hi = lower_bound, max(lower_bound, estimate)
+        probes = 0
+        while True:
+            probes += 1
+            if self._rooms_feasible(hi):
+                break
+            if hi >= upper_limit:
+                print(f"Room sizing: no feasible room count up to {hi}, keeping estimate {estimate}")
+                self.room_sizing = {"lower_bound": lower_bound, "rooms": estimate, "probes": probes}
+                return estimate
+            lo = hi + 1
+            hi = min(hi * 2, upper_limit)
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probes += 1
+            if self._rooms_feasible(mid):
+                hi = mid
+            else:
+                lo = mid + 1
+
+        print(f"Room sizing: lower bound {lower_bound}, smallest feasible {hi} ({probes} greedy passes)")
+        self.room_sizing = {"lower_bound": lower_bound, "rooms": hi, "probes": probes}
+        self._sized_rooms = True
+        return hi
+
+    def _subject_conflicts(self) -> Dict[str, Set[str]]:
+        # Subject -> subjects sharing at least one student with it
+        if self._conflicts is not None:
+            return self._conflicts
+
+        student_subjects: Dict[str, List[str]] = {}
+        for sub_name, info in self.all_subjects.items():
+            for s_id in info["student_ids"]:
+                student_subjects.setdefault(s_id, []).append(sub_name)
+
+        conflicts = {sub_name: set() for sub_name in self.all_subjects}
+        for sub_names in student_subjects.values():
+            for sub_name in sub_names:
+                conflicts[sub_name].update(sub_names)
+        for sub_name, others in conflicts.items():
+            others.discard(sub_name)
+        self._conflicts = conflicts
+        return conflicts
 
     def _preprocess_subjects(self) -> Dict[str, Any]:
+        if isinstance(self.students, EnrollmentStore):
+            return self.students.subject_table()
+
         subjects = {}
         for s in self.students:
             for sub_name, duration in s.subjects.items():
@@ -93,6 +180,15 @@ class HillClimbingScheduler:
         return dates
 
     def schedule(self) -> Tuple[List[ScheduleResult], List[str]]:
+        best_solution, best_warnings = self._search()
+        return self._format_results(best_solution), best_warnings
+
+    def schedule_json(self) -> bytes:
+        """Run the search and return a serialized ScheduleResponse body."""
+        best_solution, best_warnings = self._search()
+        return self._format_results_json(best_solution, best_warnings)
+
+    def _search(self) -> Tuple[List[Dict[str, Any]], List[str]]:
         # Hill Climbing with Random Restart
         MAX_RESTARTS = 5
         MAX_ITERATIONS = 1000
@@ -100,12 +196,27 @@ class HillClimbingScheduler:
         best_solution = []
         best_cost = float('inf')
         best_warnings = []
+        # Restarts are ranked by unplaced subjects first, then cost: hill
+        # climbing never adds back a subject the construction dropped, and no
+        # cost should let a restart with warnings beat a complete one
+        best_rank = (float('inf'), float('inf'))
+        # Counted over all restarts, for comparing runs
+        iterations_done = 0
+        iterations_to_best = 0
         
         print(f"Starting Hill Climbing with {MAX_RESTARTS} restarts...")
         
-        for restart in range(MAX_RESTARTS):
+        # After the normal restarts, an auto-sized run also climbs from the
+        # sizing pass, so it cannot end with fewer subjects placed than sizing
+        # promised, and is never ranked worse than the normal restarts alone
+        n_starts = MAX_RESTARTS + 1 if self._sized_rooms else MAX_RESTARTS
+        for restart in range(n_starts):
+            rng = self._restart_rng(restart)
             try:
-                current_solution, current_warnings = self._generate_initial_solution()
+                if restart == MAX_RESTARTS:
+                    current_solution, current_warnings = self._generate_initial_solution(shuffle=False, sizing=True)
+                else:
+                    current_solution, current_warnings = self._generate_initial_solution(rng=rng)
             except Exception as e:
                 print(f"Error generating initial solution: {e}")
                 import traceback
@@ -114,36 +225,56 @@ class HillClimbingScheduler:
                 
             current_cost = self._calculate_cost(current_solution)
             
-            if not best_solution:
-                best_solution = current_solution
-                best_cost = current_cost
-                best_warnings = current_warnings
-            
             # Hill Climbing
+            last_improvement = 0
             for i in range(MAX_ITERATIONS):
-                neighbor = self._get_neighbor(current_solution)
+                neighbor = self._get_neighbor(current_solution, rng)
                 neighbor_cost = self._calculate_cost(neighbor)
                 
                 if neighbor_cost < current_cost:
                     current_solution = neighbor
                     current_cost = neighbor_cost
+                    last_improvement = i + 1
             
             print(f"Restart {restart+1}: Cost = {current_cost}")
             
-            if current_cost < best_cost:
+            if (len(current_warnings), current_cost) < best_rank:
+                best_rank = (len(current_warnings), current_cost)
                 best_cost = current_cost
                 best_solution = current_solution
                 best_warnings = current_warnings
+                iterations_to_best = iterations_done + last_improvement
+            iterations_done += MAX_ITERATIONS
                 
-            if best_cost == 0:
+            if best_rank == (0, 0):
                 break
                 
-        return self._format_results(best_solution), best_warnings
+        self.stats = {
+            "best_cost": best_cost,
+            "unplaced": len(best_warnings),
+            "iterations": iterations_done,
+            "iterations_to_best": iterations_to_best,
+            "restarts": restart + 1
+        }
+        return best_solution, best_warnings
 
-    def _generate_initial_solution(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+    def _restart_rng(self, restart: int) -> random.Random:
+        # Each restart gets its own stream derived from the seed, so a restart
+        # replays the same way no matter how many ran before it.
+        if self.config.seed is None:
+            return random.Random()
+        return random.Random(f"{self.config.seed}:{restart}")
+
+    def _generate_initial_solution(self, shuffle: bool = True, sizing: bool = False, verbose: bool = True, rng: random.Random = None) -> Tuple[List[Dict[str, Any]], List[str]]:
         # Greedy construction similar to JS logic
+        # sizing=True is the stricter placement used to size rooms: minimum
+        # rooms per subject and no overlap between subjects sharing students
         schedule = []
         warnings = []
+        if sizing:
+            conflicts = self._subject_conflicts()
+            # date -> [(subject, start_dt, end_dt)] of placed groups
+            placed_times: Dict[str, List[Tuple[str, datetime, datetime]]] = {d: [] for d in self.dates}
         
         # Prepare subject list and shuffle
         subject_list = []
@@ -151,9 +282,14 @@ class HillClimbingScheduler:
             subject_list.append({
                 "name": name,
                 "duration": info["duration"],
-                "studentIds": list(info["student_ids"])
+                # Sorted so the order does not depend on string hashing
+                "studentIds": sorted(info["student_ids"])
             })
-        random.shuffle(subject_list)
+        if shuffle:
+            (rng or random).shuffle(subject_list)
+        else:
+            # Deterministic order for room sizing: largest subjects first
+            subject_list.sort(key=lambda sub: len(sub["studentIds"]) * sub["duration"], reverse=True)
         
         # Track room availability: room -> date -> session -> available_time_str
         room_availability = {}
@@ -182,6 +318,8 @@ class HillClimbingScheduler:
             placed = False
             # Sort dates by load (least loaded first)
             sorted_dates = sorted(self.dates, key=lambda d: date_load[d])
+            if sizing:
+                clashing = conflicts[subject["name"]]
             
             for date in sorted_dates:
                 for session in sessions:
@@ -204,11 +342,24 @@ class HillClimbingScheduler:
                         start_dt = datetime.strptime(f"{date} {next_avail_str}", "%Y-%m-%d %H:%M")
                         end_dt = start_dt + timedelta(minutes=subject["duration"])
                         session_end_dt = datetime.strptime(f"{date} {session_end_str}", "%Y-%m-%d %H:%M")
+
+                        if sizing:
+                            # Start after every exam it would overlap of a
+                            # subject that shares students with this one
+                            moved = True
+                            while moved:
+                                moved = False
+                                for other, o_start, o_end in placed_times[date]:
+                                    if other in clashing and start_dt < o_end and end_dt > o_start:
+                                        start_dt = o_end
+                                        end_dt = start_dt + timedelta(minutes=subject["duration"])
+                                        moved = True
                         
                         if end_dt <= session_end_dt:
                             available_rooms.append({
                                 "room": room_name,
-                                "start_str": next_avail_str,
+                                "start_str": start_dt.strftime("%H:%M"),
+                                "start_dt": start_dt,
                                 "end_str": end_dt.strftime("%H:%M"),
                                 "end_dt": end_dt
                             })
@@ -270,9 +421,18 @@ class HillClimbingScheduler:
                         target_rooms = max(max_rooms, min_groups)
                         # Correction: target_rooms cannot exceed max_rooms!
                         target_rooms = max_rooms
+
+                    if sizing and max_s:
+                        # Use only as many rooms as max_students requires and leave
+                        # the rest of the slot to other subjects
+                        min_groups = math.ceil(n_students / max_s)
+                        if min_groups > max_rooms:
+                            continue
+                        target_rooms = min_groups
                     
                     # Split students
                     groups = self._split_into_groups(subject["studentIds"], target_rooms)
+
                     
                     # Check conflicts for all groups
                     any_conflict = False
@@ -297,6 +457,9 @@ class HillClimbingScheduler:
                             "studentIds": grp
                         })
                         
+                        if sizing:
+                            placed_times[date].append((subject["name"], avail["start_dt"], avail["end_dt"]))
+
                         # Update room availability
                         next_start_dt = avail["end_dt"] + timedelta(minutes=self.config.break_time)
                         room_availability[avail["room"]][date][session] = next_start_dt.strftime("%H:%M")
@@ -310,7 +473,8 @@ class HillClimbingScheduler:
             
             if not placed:
                 msg = f"Không thể xếp lịch cho môn: {subject['name']} (Số lượng: {len(subject['studentIds'])})"
-                print(f"Warning: {msg}")
+                if verbose:
+                    print(f"Warning: {msg}")
                 warnings.append(msg)
                 
         return schedule, warnings
@@ -328,16 +492,16 @@ class HillClimbingScheduler:
             idx += size
         return groups
 
-    def _get_neighbor(self, solution: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _get_neighbor(self, solution: List[Dict[str, Any]], rng: random.Random) -> List[Dict[str, Any]]:
         # Swap move
         neighbor = [s.copy() for s in solution]
         if len(neighbor) < 2:
             return neighbor
             
-        idx1 = random.randint(0, len(neighbor) - 1)
-        idx2 = random.randint(0, len(neighbor) - 1)
+        idx1 = rng.randint(0, len(neighbor) - 1)
+        idx2 = rng.randint(0, len(neighbor) - 1)
         while idx1 == idx2:
-            idx2 = random.randint(0, len(neighbor) - 1)
+            idx2 = rng.randint(0, len(neighbor) - 1)
             
         # Swap content (subject, duration, students) but keep time/room slot info
         # Actually, if we swap content, we must ensure duration fits? 
@@ -455,70 +619,277 @@ class HillClimbingScheduler:
 
         return cost
 
+    def _student_names(self) -> Dict[str, str]:
+        if isinstance(self.students, EnrollmentStore):
+            return dict(zip(self.students.student_ids, self.students.names))
+        return {s.student_id: s.name for s in self.students}
+
     def _format_results(self, solution: List[Dict[str, Any]]) -> List[ScheduleResult]:
         results = []
         # Need to map student ID back to Name
-        student_map = {s.student_id: s.name for s in self.students}
+        student_map = self._student_names()
+        exam_dates = {}
         
         for entry in solution:
+            # Fields shared by every student in the entry are resolved once
+            exam_date = exam_dates.get(entry["date"])
+            if exam_date is None:
+                exam_date = exam_dates[entry["date"]] = datetime.strptime(entry["date"], "%Y-%m-%d").date()
+            fields = {
+                "subject": entry["subject"],
+                "exam_date": exam_date,
+                "shift": entry["session"],
+                "start_time": entry["startTime"],
+                "end_time": entry["endTime"],
+                "room": entry["room"]
+            }
+            # Values come from our own solution, so skip pydantic validation
             for s_id in entry["studentIds"]:
-                results.append(ScheduleResult(
+                results.append(ScheduleResult.construct(
                     student_id=s_id,
                     student_name=student_map.get(s_id, "Unknown"),
-                    subject=entry["subject"],
-                    exam_date=datetime.strptime(entry["date"], "%Y-%m-%d").date(),
-                    shift=entry["session"],
-                    start_time=entry["startTime"],
-                    end_time=entry["endTime"],
-                    room=entry["room"]
+                    **fields
                 ))
         return results
 
-def parse_json(file_content: bytes) -> List[StudentData]:
+    def _format_results_json(self, solution: List[Dict[str, Any]], warnings: List[str]) -> bytes:
+        # Builds the same JSON FastAPI would produce for a ScheduleResponse, but
+        # without creating a model per row: each entry's shared fields are
+        # encoded once and every student in it only adds its id and name.
+        dumps = json.dumps
+        name_json = {s_id: dumps(name, ensure_ascii=False) for s_id, name in self._student_names().items()}
+        unknown = dumps("Unknown")
+
+        rows = []
+        for entry in solution:
+            shared = (
+                f',"subject":{dumps(entry["subject"], ensure_ascii=False)}'
+                f',"exam_date":"{entry["date"]}"'
+                f',"shift":{dumps(entry["session"], ensure_ascii=False)}'
+                f',"start_time":{dumps(entry["startTime"])}'
+                f',"end_time":{dumps(entry["endTime"])}'
+                f',"room":{dumps(entry["room"], ensure_ascii=False)}}}'
+            )
+            for s_id in entry["studentIds"]:
+                rows.append(
+                    f'{{"student_id":{dumps(s_id, ensure_ascii=False)}'
+                    f',"student_name":{name_json.get(s_id, unknown)}{shared}'
+                )
+
+        warnings_json = dumps(warnings, ensure_ascii=False, separators=(",", ":"))
+        sizing_json = dumps(self.room_sizing or None, separators=(",", ":"))
+        return f'{{"results":[{",".join(rows)}],"warnings":{warnings_json},"room_sizing":{sizing_json}}}'.encode("utf-8")
+
+class EnrollmentStore:
+    """Compact enrolment table filled incrementally by the streaming JSON parser.
+
+    Students are stored as parallel id/name lists and their subjects as interned
+    codes in one flat array (offsets[i]:offsets[i+1] belong to student i), so
+    memory stays close to the size of the dataset instead of one pydantic model
+    per student. Every distinct duration is validated, but like the scheduler
+    each subject keeps the first duration seen. Iterating yields StudentData
+    objects for code that expects a list of them.
+    """
+
+    def __init__(self):
+        self.student_ids: List[str] = []
+        self.names: List[Any] = []
+        self.subject_names: List[str] = []
+        self.subject_durations = array('l')
+        self._subject_codes: Dict[str, int] = {}
+        # Distinct (code, raw duration) pairs in first-seen order
+        self._raw_durations: List[Tuple[int, Any]] = []
+        self._seen_durations: Set[Tuple[int, Any]] = set()
+        self._offsets = array('l', [0])
+        self._codes = array('l')
+
+    def add(self, student_id: Any, name: Any, subjects: Dict[str, Any]):
+        for sub_name, duration in subjects.items():
+            sub_name = str(sub_name)
+            code = self._subject_codes.get(sub_name)
+            if code is None:
+                code = len(self.subject_names)
+                self._subject_codes[sub_name] = code
+                self.subject_names.append(sub_name)
+            key = (code, duration)
+            if key not in self._seen_durations:
+                self._seen_durations.add(key)
+                self._raw_durations.append(key)
+            self._codes.append(code)
+        self._offsets.append(len(self._codes))
+        self.student_ids.append(str(student_id))
+        # Checked in validate(), like the durations
+        self.names.append(name)
+
+    def validate(self):
+        # One pydantic pass over the names and one over the distinct durations,
+        # instead of one model per student.
+        self.names = parse_obj_as(List[str], self.names)
+        checked = parse_obj_as(
+            List[Tuple[str, int]],
+            [(self.subject_names[code], raw) for code, raw in self._raw_durations]
+        )
+        durations: Dict[int, int] = {}
+        for (code, _), (_, duration) in zip(self._raw_durations, checked):
+            durations.setdefault(code, duration)
+        self.subject_durations = array('l', (durations[code] for code in range(len(self.subject_names))))
+        self._raw_durations = []
+        self._seen_durations = set()
+
+    def subject_table(self) -> Dict[str, Any]:
+        """Same shape as HillClimbingScheduler._preprocess_subjects()."""
+        subjects = {
+            name: {"duration": self.subject_durations[code], "student_ids": set()}
+            for code, name in enumerate(self.subject_names)
+        }
+        names = self.subject_names
+        for i, s_id in enumerate(self.student_ids):
+            for code in self._codes[self._offsets[i]:self._offsets[i + 1]]:
+                subjects[names[code]]["student_ids"].add(s_id)
+        return subjects
+
+    def __len__(self) -> int:
+        return len(self.student_ids)
+
+    def __iter__(self) -> Iterator[StudentData]:
+        names = self.subject_names
+        durations = self.subject_durations
+        for i, s_id in enumerate(self.student_ids):
+            codes = self._codes[self._offsets[i]:self._offsets[i + 1]]
+            # Already validated in bulk, so skip per-model validation
+            yield StudentData.construct(
+                student_id=s_id,
+                name=self.names[i],
+                subjects={names[c]: durations[c] for c in codes}
+            )
+
+
+def iter_json_records(stream: BinaryIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield records one at a time from a JSON array or newline-delimited JSON.
+
+    The stream is decoded chunk by chunk, so only the record being parsed is
+    held as text. Arrays are checked as strictly as json.loads would: a missing
+    or doubled comma, a missing closing bracket (e.g. a truncated upload) or
+    data after it raises json.JSONDecodeError. A {"students": [...]} wrapper
+    object is still accepted, but it has to be decoded as a whole. Any other
+    single top-level object only counts as one-line NDJSON when a newline
+    follows it.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8-sig')()
+    buf, pos, eof = "", 0, False
+    # None outside an array, then "open" (after "["), "value" (after ","),
+    # "sep" (after a record) and "closed" (after "]")
+    array = None
+    at_start = True
+    first_object = None
+    newline_after_first = False
+    read_size = chunk_size
+
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n":
+            if buf[pos] == "\n" and first_object is not None:
+                newline_after_first = True
+            pos += 1
+
+        if pos < len(buf):
+            char = buf[pos]
+            if at_start and char == "[":
+                at_start = False
+                array = "open"
+                pos += 1
+                continue
+            if array == "closed":
+                raise json.JSONDecodeError("Extra data after the JSON array", buf, pos)
+            if array == "sep" or (array == "open" and char == "]"):
+                if char == ",":
+                    array = "value"
+                elif char == "]":
+                    array = "closed"
+                else:
+                    raise json.JSONDecodeError("Expecting ',' or ']'", buf, pos)
+                pos += 1
+                continue
+            try:
+                record, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                if array is not None:
+                    array = "sep"
+                    yield record
+                elif at_start and isinstance(record, dict) and "students" in record:
+                    yield from record["students"]
+                elif at_start and isinstance(record, dict):
+                    # Only a record if this turns out to be NDJSON
+                    first_object = record
+                else:
+                    if first_object is not None:
+                        yield first_object
+                        first_object = None
+                    yield record
+                at_start = False
+                read_size = chunk_size
+                continue
+            # Record is cut off at the end of the buffer: read more, growing the
+            # read size so a very large record is not re-parsed once per chunk.
+            read_size = max(read_size, len(buf) - pos)
+        elif eof:
+            if array not in (None, "closed"):
+                raise json.JSONDecodeError("Unexpected end of the JSON array", buf, pos)
+            if first_object is not None and newline_after_first:
+                yield first_object
+            return
+
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buf = buf[pos:] + text.decode(chunk or b"", final=eof)
+        pos = 0
+
+
+def _normalize_subjects(raw_subjects: Any) -> Dict[str, Any]:
+    # Handle subjects being a list or dict
+    if isinstance(raw_subjects, dict):
+        return raw_subjects
+
+    subjects_dict = {}
+    if isinstance(raw_subjects, list):
+        # Assume list of objects with name/duration keys
+        # e.g. [{"name": "Math", "duration": 60}, ...]
+        for sub in raw_subjects:
+            # Try various common keys
+            name = sub.get("name") or sub.get("subject") or sub.get("subject_name")
+            duration = sub.get("duration") or sub.get("time") or sub.get("minutes")
+            if name and duration:
+                subjects_dict[name] = int(duration)
+    return subjects_dict
+
+
+def parse_json(file_content: Union[bytes, BinaryIO]) -> EnrollmentStore:
+    # Accepts raw bytes or a binary file object (e.g. UploadFile.file) so large
+    # uploads can be streamed instead of decoded in one go.
+    # JS says: { "student_id": 1, "name": "SV1", "subjects": { "Toán": 60 } }
+    if isinstance(file_content, (bytes, bytearray)):
+        file_content = BytesIO(file_content)
+
+    store = EnrollmentStore()
     try:
-        data = json.loads(file_content.decode('utf-8'))
-        students = []
-        # Expected format: List of dicts or Dict with 'students' key?
-        # JS says: { "student_id": 1, "name": "SV1", "subjects": { "Toán": 60 } }
-        # If data is list
-        if isinstance(data, list):
-            raw_list = data
-        elif isinstance(data, dict) and "students" in data:
-            raw_list = data["students"]
-        else:
-            raw_list = []
-            
-        for item in raw_list:
-            # Handle subjects being a list or dict
-            raw_subjects = item.get("subjects", {})
-            subjects_dict = {}
-            
-            if isinstance(raw_subjects, dict):
-                subjects_dict = raw_subjects
-            elif isinstance(raw_subjects, list):
-                # Assume list of objects with name/duration keys
-                # e.g. [{"name": "Math", "duration": 60}, ...]
-                for sub in raw_subjects:
-                    # Try various common keys
-                    name = sub.get("name") or sub.get("subject") or sub.get("subject_name")
-                    duration = sub.get("duration") or sub.get("time") or sub.get("minutes")
-                    if name and duration:
-                        subjects_dict[name] = int(duration)
-            
-            s = StudentData(
-                student_id=str(item.get("student_id", "")),
-                name=item.get("name", ""),
-                subjects=subjects_dict
+        for item in iter_json_records(file_content):
+            store.add(
+                item.get("student_id", ""),
+                item.get("name", ""),
+                _normalize_subjects(item.get("subjects", {}))
             )
-            students.append(s)
-        return students
+        store.validate()
     except Exception as e:
         print(f"JSON Parse Error: {e}")
-        return []
+        return EnrollmentStore()
+    return store
 
 def parse_excel(file_content: bytes) -> List[StudentData]:
     try:
-        df = pd.read_excel(file_content)
+        df = pd.read_excel(BytesIO(file_content))
     except:
         return []
 
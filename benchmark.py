@@ -0,0 +1,199 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from backend.models.schema import ScheduleConfig, ScheduleResponse
+from backend.services.scheduler import EnrollmentStore, HillClimbingScheduler, parse_excel, parse_json
+
+# Scheduler benchmarks.
+# Usage:
+#   python benchmark.py format --students 20000   result formatting throughput
+#   python benchmark.py regress                   compare against the baseline
+#   python benchmark.py regress --save            record a new baseline
+
+
+def generate_students(n_students, n_subjects, per_student, seed=0):
+    rng = random.Random(seed)
+    subjects = {f"Môn {j+1}": rng.choice([60, 90, 120]) for j in range(n_subjects)}
+    names = list(subjects)
+    store = EnrollmentStore()
+    for i in range(n_students):
+        chosen = rng.sample(names, per_student)
+        store.add(f"SV{i+1:05d}", f"Sinh viên {i+1}", {name: subjects[name] for name in chosen})
+    store.validate()
+    return store
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_formatting(scheduler, solution, warnings, repeat):
+    n_rows = sum(len(entry["studentIds"]) for entry in solution)
+
+    def model_path():
+        # What the endpoint used to do: models, then response_model validation
+        # and JSONResponse rendering in FastAPI
+        results = scheduler._format_results(solution)
+        response = ScheduleResponse.parse_obj(jsonable_encoder(ScheduleResponse(results=results, warnings=warnings)))
+        return JSONResponse(jsonable_encoder(response)).body
+
+    def bytes_path():
+        return scheduler._format_results_json(solution, warnings)
+
+    model_time, model_body = timed(model_path, repeat)
+    bytes_time, bytes_body = timed(bytes_path, repeat)
+    if json.loads(model_body) != json.loads(bytes_body):
+        raise SystemExit("Formatted output differs between model and bytes paths")
+
+    print(f"Rows: {n_rows}")
+    print(f"format (models + serialize): {model_time:.3f}s  {n_rows / model_time:,.0f} rows/s")
+    print(f"format (direct to bytes):    {bytes_time:.3f}s  {n_rows / bytes_time:,.0f} rows/s")
+
+
+# Regression corpus: the sample files plus generated instances. Every run uses
+# the same dates and seed, so cost and iterations only change with the code and
+# are kept in the committed baseline. Wall time depends on the machine and is
+# kept in a separate, git-ignored file.
+CORPUS_FILES = [
+    "Du_Lieu_Test/MauDuLieu.json",
+    "Du_Lieu_Test/student_exam.xlsx",
+    "Du_Lieu_Test/student_scores_500sv.xlsx",
+]
+GENERATED = {
+    "generated_1000": (1000, 20, 4),
+    "generated_2500": (2500, 30, 5),
+}
+
+
+def load_corpus():
+    for path in CORPUS_FILES:
+        with open(path, "rb") as f:
+            content = f.read()
+        yield path, parse_json(content) if path.endswith(".json") else parse_excel(content)
+    for name, (n_students, n_subjects, per_student) in GENERATED.items():
+        yield name, generate_students(n_students, n_subjects, per_student, seed=n_students)
+
+
+def run_instance(students, seed):
+    config = ScheduleConfig(start_date="2025-06-02", end_date="2025-06-13", max_students_per_room=50, seed=seed)
+    start = time.perf_counter()
+    # The solver reports progress with print(); keep the harness output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler = HillClimbingScheduler(config, students)
+        scheduler._search()
+    wall_time = time.perf_counter() - start
+    return {
+        "cost": round(scheduler.stats["best_cost"], 6),
+        "iterations_to_best": scheduler.stats["iterations_to_best"],
+    }, round(wall_time, 3)
+
+
+def find_regressions(record, base, wall_time, base_time, tolerance, time_tolerance):
+    flags = []
+    if base is None:
+        flags.append("instance missing from the baseline")
+        return flags
+    if record["cost"] > base["cost"] * (1 + tolerance) + 1e-6:
+        flags.append(f"cost {base['cost']} -> {record['cost']}")
+    if record["iterations_to_best"] > base["iterations_to_best"] * (1 + tolerance):
+        flags.append(f"iterations_to_best {base['iterations_to_best']} -> {record['iterations_to_best']}")
+    if base_time is not None and wall_time > base_time * (1 + time_tolerance):
+        flags.append(f"wall_time {base_time}s -> {wall_time}s")
+    return flags
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def bench_regression(args):
+    baseline = None if args.save else load_json(args.baseline)
+    if baseline is None and not args.save:
+        print(f"No baseline at {args.baseline}; run with --save to create one")
+        return 2
+    times = (None if args.save else load_json(args.times)) or {}
+
+    records = {}
+    wall_times = {}
+    regressions = 0
+    print(f"{'instance':<42} {'cost':>12} {'iter_to_best':>12} {'wall(s)':>8}")
+    for name, students in load_corpus():
+        record, wall_time = run_instance(students, args.seed)
+        for _ in range(args.repeat - 1):
+            # Cost and iterations are fixed by the seed; only time varies
+            wall_time = min(wall_time, run_instance(students, args.seed)[1])
+        records[name] = record
+        wall_times[name] = wall_time
+        print(f"{name:<42} {record['cost']:>12} {record['iterations_to_best']:>12} {wall_time:>8}")
+
+        if not args.save:
+            flags = find_regressions(record, baseline.get(name), wall_time, times.get(name), args.tolerance, args.time_tolerance)
+            for flag in flags:
+                print(f"  REGRESSION: {flag}")
+            regressions += bool(flags)
+
+    if args.save:
+        save_json(args.baseline, records)
+        save_json(args.times, wall_times)
+        print(f"Saved baseline to {args.baseline} and wall times to {args.times}")
+        return 0
+    if not times:
+        print(f"No wall times at {args.times}; only cost and iterations were compared")
+    print(f"{regressions} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduler benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fmt = commands.add_parser("format", help="Result formatting throughput")
+    fmt.add_argument("--students", type=int, default=20000)
+    fmt.add_argument("--subjects", type=int, default=30)
+    fmt.add_argument("--per-student", type=int, default=5)
+    fmt.add_argument("--repeat", type=int, default=3)
+
+    reg = commands.add_parser("regress", help="Seeded solver runs over a fixed corpus, compared to a baseline")
+    reg.add_argument("--baseline", default="benchmark_baseline.json", help="Cost and iterations per instance (committed)")
+    reg.add_argument("--times", default="benchmark_times.json", help="Wall time per instance (local to this machine)")
+    reg.add_argument("--save", action="store_true", help="Write the results as the new baseline and wall times")
+    reg.add_argument("--seed", type=int, default=42)
+    reg.add_argument("--tolerance", type=float, default=0.0, help="Allowed relative increase of cost and iterations")
+    reg.add_argument("--time-tolerance", type=float, default=0.25, help="Allowed relative increase of wall time")
+    reg.add_argument("--repeat", type=int, default=1, help="Runs per instance; the fastest time is kept")
+    args = parser.parse_args()
+
+    if args.command == "regress":
+        sys.exit(bench_regression(args))
+
+    store = generate_students(args.students, args.subjects, args.per_student)
+    config = ScheduleConfig(start_date="2025-06-02", end_date="2025-06-27", max_students_per_room=50)
+    scheduler = HillClimbingScheduler(config, store)
+    solution, warnings = scheduler._generate_initial_solution(verbose=False)
+    bench_formatting(scheduler, solution, warnings, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import json
+import random
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from backend.models.schema import ScheduleConfig, ScheduleResponse, ScheduleResult
+from backend.services.scheduler import EnrollmentStore, HillClimbingScheduler
+
+# /api/schedule returns the bytes built by _format_results_json() directly,
+# skipping response_model validation, so they must stay identical to what
+# FastAPI would send for a ScheduleResponse.
+
+
+def make_scheduler(auto_size_rooms=False):
+    store = EnrollmentStore()
+    store.add("SV1", 'Nguyễn "Văn" A', {"Toán": 90, "Lý": 60})
+    store.add("SV2", "Trần Thị B", {"Toán": 90, "Hóa": 120})
+    store.add("SV3", "Lê C\\D", {"Lý": 60, "Hóa": 120, "Văn": 90})
+    store.add(4, "Phạm D", {"Toán": 90, "Văn": 90})
+    store.validate()
+    config = ScheduleConfig(
+        start_date="2025-06-02",
+        end_date="2025-06-06",
+        max_students_per_room=2,
+        auto_size_rooms=auto_size_rooms,
+        seed=1
+    )
+    return HillClimbingScheduler(config, store)
+
+
+def response_model_body(scheduler, solution, warnings):
+    # What FastAPI sends for a route with response_model=ScheduleResponse
+    response = ScheduleResponse(
+        results=scheduler._format_results(solution),
+        warnings=warnings,
+        room_sizing=scheduler.room_sizing or None
+    )
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+@pytest.mark.parametrize("auto_size_rooms", [False, True])
+def test_format_results_json_matches_response_model(auto_size_rooms):
+    scheduler = make_scheduler(auto_size_rooms)
+    solution, warnings = scheduler._generate_initial_solution(verbose=False, rng=random.Random(0))
+    warnings = warnings + ['Cảnh báo "thử"']
+
+    body = scheduler._format_results_json(solution, warnings)
+
+    assert solution
+    assert body == response_model_body(scheduler, solution, warnings)
+
+
+def test_schedule_json_has_response_model_fields():
+    scheduler = make_scheduler(auto_size_rooms=True)
+
+    data = json.loads(scheduler.schedule_json())
+
+    assert set(data) == set(ScheduleResponse.__fields__)
+    assert data["results"]
+    for row in data["results"]:
+        assert set(row) == set(ScheduleResult.__fields__)
+    assert ScheduleResponse.parse_obj(data).room_sizing is not None